@@ -1,9 +1,24 @@
 import streamlit as st
 import pandas as pd
 import os
+import codecs
+import pathlib
+import io
+import logging
+import tempfile
+import numpy as np
 import warnings
 import plotly.express as px
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:  # 可选依赖：未安装时非UTF-8文件按gbk处理
+    detect_charset = None
 warnings.filterwarnings('ignore')
+logger = logging.getLogger(__name__)
 
 # ===================== 页面基础配置 =====================
 st.set_page_config(
@@ -14,18 +29,18 @@ st.set_page_config(
 )
 
 # ===================== Session State 初始化 =====================
-if 'selected_year' not in st.session_state:
-    st.session_state.selected_year = "全部年份"
-if 'search_input' not in st.session_state:
-    st.session_state.search_input = ""
-if 'search_type' not in st.session_state:
-    st.session_state.search_type = "股票代码"
-if 'search_results' not in st.session_state:
-    st.session_state.search_results = None
+SESSION_DEFAULTS = {
+    'selected_year': None,  # None 表示全部年份
+    'search_input': "",
+    'search_type': "股票代码",
+    'search_results': None
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
 
 # ===================== 自定义CSS样式 =====================
-def load_basic_css():
-    st.markdown("""
+# 样式表在导入时拼成一行常量（去掉缩进与空行），每次rerun只发送压缩后的字符串
+BASIC_CSS = "".join(line.strip() for line in """
     <style>
         h1 {
             color: #2E86AB; 
@@ -69,83 +84,311 @@ def load_basic_css():
             margin: 1rem 0;
             border: none;
         }
+        .divider.compact {
+            margin: 0.5rem 0;
+        }
     </style>
-    """, unsafe_allow_html=True)
+""".splitlines())
+
+# 分隔线的样式都在样式表中，页面各处只引用类名
+DIVIDER_HTML = '<hr class="divider">'
+SIDEBAR_DIVIDER_HTML = '<hr class="divider compact">'
+
+def load_basic_css():
+    st.markdown(BASIC_CSS, unsafe_allow_html=True)
+
+# ===================== 数据文件配置 =====================
+SOURCE_FILE_PATH = '1999-2023年数字化转型指数汇总.csv'
+# 源文件的Parquet副本与源文件同名、同目录
+PARQUET_FILE_PATH = str(pathlib.Path(SOURCE_FILE_PATH).with_suffix('.parquet'))
+SOURCE_TAG_KEY = b'source_stat'  # Parquet元数据中记录源文件标识的键
+REQUIRED_COLS = ['股票代码', '企业名称', '年份', '数字化转型指数']
+MIN_YEAR, MAX_YEAR = 1999, 2023
+# 年份范围固定，下拉选项作为模块常量，不随每次rerun重新计算；
+# 选项直接用int，None 代表全部年份，查询热路径里不再做字符串比较与 int() 转换
+ALL_YEARS_LABEL = "全部年份"
+YEAR_OPTIONS = [None] + list(range(MIN_YEAR, MAX_YEAR + 1))
+
+def format_year(year):
+    return ALL_YEARS_LABEL if year is None else str(year)
+
+# 源CSV只解析需要的列，并直接指定列类型，跳过类型推断
+SOURCE_COLUMN_TYPES = {
+    '股票代码': pa.string(),
+    '企业名称': pa.string(),
+    '年份': pa.int16(),
+    '数字化转型指数': pa.float32()
+}
+ENCODING_SAMPLE_SIZE = 64 * 1024
+# 详细数据表每页行数：只把当前页序列化发送到浏览器
+PAGE_SIZE = 50
 
 # ===================== 数据加载函数 =====================
-@st.cache_data(ttl=3600, show_spinner="正在加载数据...")
-def load_data():
+# 读取文件头64KB判定编码：有BOM为utf-8-sig，能按UTF-8严格解码为utf-8，
+# 否则交给charset_normalizer对样本做探测，仍无结果时按gbk
+def detect_encoding(file_path):
+    with open(file_path, 'rb') as f:
+        head = f.read(ENCODING_SAMPLE_SIZE)
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
     try:
-        file_path = '1999-2023年数字化转型指数汇总.csv' 
-        if not os.path.exists(file_path):
-            return {"status": "error", "msg": f"文件不存在：{file_path}"}
-        
-        file_ext = os.path.splitext(file_path)[1].lower()
-        df = None
-        if file_ext == '.csv':
-            encodings = ['gbk', 'gb2312', 'utf-8-sig', 'latin-1']
-            for enc in encodings:
-                try:
-                    df = pd.read_csv(file_path, encoding=enc)
-                    break
-                except:
-                    continue
-            if df is None:
-                return {"status": "error", "msg": "无法识别CSV编码"}
-        elif file_ext in ['.xlsx', '.xlsm']:
-            try:
-                df = pd.read_excel(file_path, sheet_name='Sheet1', engine='openpyxl')
-            except Exception as e:
-                return {"status": "error", "msg": f"Excel读取失败：{str(e)}"}
-        else:
-            return {"status": "error", "msg": "不支持的格式"}
-        
-        required_cols = ['股票代码', '企业名称', '年份', '数字化转型指数']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        # 增量解码器允许末尾被截断的多字节字符
+        codecs.getincrementaldecoder('utf-8')(errors='strict').decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if detect_charset is not None:
+        best = detect_charset(head).best()
+        if best is not None:
+            return best.encoding
+    return 'gbk'
+
+def read_source_file(file_path):
+    if not os.path.exists(file_path):
+        return {"status": "error", "msg": f"文件不存在：{file_path}"}
+    
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext == '.csv':
+        enc = detect_encoding(file_path)
+        try:
+            # PyArrow多线程CSV解析
+            read_options = pa_csv.ReadOptions(use_threads=True, encoding=enc)
+            convert_options = pa_csv.ConvertOptions(include_columns=REQUIRED_COLS, column_types=SOURCE_COLUMN_TYPES)
+            table = pa_csv.read_csv(file_path, read_options=read_options, convert_options=convert_options)
+        except KeyError as e:
+            return {"status": "error", "msg": f"缺少列：{str(e)}"}
+        except UnicodeDecodeError:
+            return {"status": "error", "msg": f"无法识别CSV编码（按 {enc} 解析失败）"}
+        except pa.ArrowInvalid as e:
+            # 列值与指定类型不符、列数不一致等数据格式问题，原样给出Arrow的报错便于定位
+            return {"status": "error", "msg": f"CSV数据格式错误：{str(e)}"}
+        # 代码补零、名称去空白与指数取整直接在Arrow表上用C++计算内核完成，再转为Arrow后端的DataFrame
+        table = table.set_column(
+            table.schema.get_field_index('股票代码'), '股票代码',
+            pc.utf8_lpad(table['股票代码'], width=6, padding='0')
+        )
+        table = table.set_column(
+            table.schema.get_field_index('企业名称'), '企业名称',
+            pc.utf8_trim_whitespace(table['企业名称'])
+        )
+        table = table.set_column(
+            table.schema.get_field_index('数字化转型指数'), '数字化转型指数',
+            pc.round(table['数字化转型指数'], ndigits=2)
+        )
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    elif file_ext in ['.xlsx', '.xlsm']:
+        try:
+            df = pd.read_excel(file_path, sheet_name='Sheet1', engine='openpyxl')
+        except Exception as e:
+            return {"status": "error", "msg": f"Excel读取失败：{str(e)}"}
+        missing_cols = [col for col in REQUIRED_COLS if col not in df.columns]
         if missing_cols:
             return {"status": "error", "msg": f"缺少列：{', '.join(missing_cols)}"}
-        
-        df['股票代码'] = df['股票代码'].astype(str).str.zfill(6)
-        df['企业名称'] = df['企业名称'].str.strip()
-        df['年份'] = df['年份'].astype(int)
+        # 整数代码直接格式化为定长字符串数组，由 np.char.zfill 在C层补零
+        df['股票代码'] = np.char.zfill(df['股票代码'].to_numpy().astype('U6'), 6)
+        # 名称去空白用普通列表推导，省去 .str 访问器逐元素的包装开销（非字符串值原样保留）
+        df['企业名称'] = [name.strip() if isinstance(name, str) else name for name in df['企业名称'].tolist()]
         df['数字化转型指数'] = df['数字化转型指数'].round(2)
-        df = df[(df['年份'] >= 1999) & (df['年份'] <= 2023)]
+    else:
+        return {"status": "error", "msg": "不支持的格式"}
+    
+    df['年份'] = df['年份'].astype('int16')
+    df['数字化转型指数'] = df['数字化转型指数'].astype('float32')
+    df = df[(df['年份'] >= MIN_YEAR) & (df['年份'] <= MAX_YEAR)].reset_index(drop=True)
+    return {"status": "success", "data": df}
+
+# 源文件标识：修改时间(纳秒)+文件大小，写入Parquet元数据，用来判断副本是否对应当前源文件
+def source_stat_tag(mtime_ns, size):
+    return f"{mtime_ns}:{size}"
+
+# Parquet副本元数据中的源文件标识与当前源文件一致才可直接使用；副本缺失或损坏都视为过期
+def parquet_is_fresh(parquet_path, source_tag):
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+    except Exception:
+        return False
+    return metadata.get(SOURCE_TAG_KEY) == source_tag.encode()
+
+# 一次性转换：读取并清洗源文件后写出zstd压缩的Parquet，之后的冷启动直接读取列式数据
+def convert_to_parquet(file_path=SOURCE_FILE_PATH, parquet_path=PARQUET_FILE_PATH, source_tag=None):
+    result = read_source_file(file_path)
+    if result["status"] == "success":
+        # 先写同目录临时文件再原子替换：中途崩溃或磁盘写满不会留下半截Parquet，其他会话也读不到未写完的文件
+        tmp_path = None
+        try:
+            table = pa.Table.from_pandas(result["data"], preserve_index=False)
+            if source_tag is not None:
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_TAG_KEY: source_tag.encode()})
+            fd, tmp_path = tempfile.mkstemp(suffix='.parquet.tmp', dir=os.path.dirname(os.path.abspath(parquet_path)))
+            os.close(fd)
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, parquet_path)
+        except Exception:
+            # 写出失败（如目录只读）不影响本次加载，下次启动仍走源文件
+            logger.exception("Parquet副本写出失败：%s", parquet_path)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return result
+
+# 统一列类型：股票代码、企业名称转category，年份int16，指数float32
+def optimize_dtypes(df):
+    df['股票代码'] = df['股票代码'].astype('category')
+    df['企业名称'] = df['企业名称'].astype('category')
+    df['年份'] = df['年份'].astype('int16')
+    df['数字化转型指数'] = df['数字化转型指数'].astype('float32')
+    return df
+
+# 读取并预处理数据集，只返回DataFrame，结果持久化到磁盘；
+# 缓存键为 (源文件路径, 修改时间, 文件大小)：源文件不变就一直命中，源文件一变立即失效，不再依赖定时过期
+@st.cache_data(persist="disk", show_spinner="正在加载数据...")
+def read_dataset(data_path, mtime_ns, size):
+    df = None
+    source_tag = source_stat_tag(mtime_ns, size)
+    # 没有源文件时只能直接读Parquet；有源文件时仅当副本记录的源文件标识一致才用副本
+    if data_path.endswith('.parquet') or parquet_is_fresh(PARQUET_FILE_PATH, source_tag):
+        parquet_path = data_path if data_path.endswith('.parquet') else PARQUET_FILE_PATH
+        try:
+            # Parquet已是清洗后的数据，跳过编码探测与逐行字符串清洗
+            # 只读取用到的列，其余词频列不解码
+            df = pd.read_parquet(parquet_path, columns=REQUIRED_COLS, engine='pyarrow', dtype_backend='pyarrow')
+        except Exception:
+            # Parquet副本损坏时改读源文件，并借此重新生成副本
+            logger.exception("Parquet副本读取失败，改读源文件：%s", parquet_path)
+            if data_path.endswith('.parquet'):
+                raise
+    if df is None:
+        result = convert_to_parquet(data_path, source_tag=source_tag)
+        if result["status"] == "error":
+            raise ValueError(result["msg"])  # 异常不会被缓存，修复文件后可立即重试
+        df = result["data"]
+    
+    df = optimize_dtypes(df)
+    # 按 (股票代码, 年份降序) 预排序：同一公司的记录连续且最新年份在前，查询结果按位置取出即已有序，无需逐次排序
+    df = df.sort_values(['股票代码', '年份'], ascending=[True, False]).reset_index(drop=True)
+    return df
+
+# 基于已加载数据构建查询用的辅助结构；按数据版本号缓存，不哈希整张表
+# 用cache_resource共享同一份对象：这些结构只读，cache_data每次重跑都要反序列化数千个数组
+@st.cache_resource(max_entries=1, show_spinner=False)  # 只保留当前数据版本的索引
+def build_search_index(_df, data_version):
+    # 股票代码 -> 行位置 的哈希索引，完整代码查询直接命中
+    code_index = {
+        str(code): rows
+        for code, rows in _df.groupby('股票代码', sort=False, observed=True).indices.items()
+    }
+    # 每个年份一份布尔掩码，单年份查询时直接与匹配结果相与
+    years = _df['年份'].to_numpy()
+    year_masks = {year: years == year for year in range(MIN_YEAR, MAX_YEAR + 1)}
+    # 每家公司全部年份的指数统计，单公司查询直接查表
+    # 指数以float32存储，统计前还原为两位小数的float64，均值与原始数据计算结果一致
+    index_values = _df['数字化转型指数'].astype('float64').round(2)
+    company_stats = index_values.groupby(_df['股票代码'], observed=True).agg(['mean', 'min', 'max', 'count'])
+    # 股票代码类别（约5千个）的Arrow数组，部分代码查询只在它上面做子串匹配
+    code_categories = pa.array(_df['股票代码'].cat.categories.astype(str).tolist())
+    # 企业名称类别（约8千个）预先转小写，名称查询只在去重后的名称上做字面子串匹配
+    name_categories_lower = pc.utf8_lower(pa.array(_df['企业名称'].cat.categories.astype(str).tolist()))
+    return {
+        "code_index": code_index,
+        "year_masks": year_masks,
+        "company_stats": company_stats,
+        "code_categories": code_categories,
+        "name_categories_lower": name_categories_lower
+    }
+
+def load_data():
+    try:
+        # 以源文件的状态为准：源文件被替换后旧的Parquet副本自动作废；仅在没有源文件时才直接使用Parquet
+        data_path = pathlib.Path(SOURCE_FILE_PATH if os.path.exists(SOURCE_FILE_PATH) else PARQUET_FILE_PATH)
+        if not data_path.exists():
+            return {"status": "error", "msg": f"文件不存在：{SOURCE_FILE_PATH}"}
         
-        return {"status": "success", "data": df, "msg": f"加载成功！{len(df):,} 条记录"}
+        stat = data_path.stat()
+        df = read_dataset(str(data_path), stat.st_mtime_ns, stat.st_size)
+        # 数据版本号：下游缓存函数不哈希整张表，改用它区分不同批次的数据
+        data_version = (stat.st_mtime_ns, stat.st_size)
+        return {
+            "status": "success",
+            "data": df,
+            "data_version": data_version,
+            "index": build_search_index(df, data_version),
+            "msg": f"加载成功！{len(df):,} 条记录"
+        }
     except Exception as e:
         return {"status": "error", "msg": f"加载失败：{str(e)}"}
 
 # ===================== 搜索功能函数 =====================
-def search_data(df, search_input, search_type, selected_year):
-    try:
-        result_df = df.copy()
-        if search_type == "股票代码":
-            search_code = str(search_input).strip().zfill(6)
-            result_df = result_df[result_df['股票代码'].str.contains(search_code, na=False)]
+# 在Arrow字符串数组上执行子串匹配，返回numpy布尔掩码
+def arrow_match(values, pattern):
+    mask = pc.fill_null(pc.match_substring(values, pattern), False)
+    return mask.to_numpy(zero_copy_only=False)
+
+# 类别级匹配结果按类别编码展开为逐行掩码（编码-1为缺失值，对应末尾追加的False）
+def expand_category_mask(category_mask, codes):
+    return np.append(category_mask, False)[codes]
+
+# 缓存键只由标量 (数据版本, 查询内容, 查询方式, 年份) 决定，数据与索引在函数内从 load_data 的缓存取得
+# 出错时直接抛出异常：异常不会被缓存，下次查询会重新执行
+@st.cache_data(max_entries=256, ttl=3600, show_spinner=False)
+def query_data(data_version, search_input, search_type, selected_year):
+    data_result = load_data()
+    if data_result["status"] == "error":
+        raise ValueError(data_result["msg"])
+    df, search_index = data_result["data"], data_result["index"]
+    year_masks = search_index["year_masks"]
+    
+    needle = str(search_input).strip()
+    if not needle:
+        # 空查询不做任何字符串匹配（也避免空串 zfill 成 '000000' 误匹配）
+        if selected_year is None:
+            return df, df
+        return df, df.loc[year_masks[selected_year]]
+    
+    if search_type == "股票代码":
+        if len(needle) <= 6 and needle.isdigit():
+            # 数字输入补零到6位后与6位代码的子串匹配等价于相等比较，直接走哈希索引 O(1) 查找
+            rows = search_index["code_index"].get(needle.zfill(6), np.empty(0, dtype=np.intp))
         else:
-            search_name = str(search_input).strip().lower()
-            result_df = result_df[result_df['企业名称'].str.lower().str.contains(search_name, na=False)]
-        
-        # 即使选单一年份，也保留所有年份数据（用于画趋势图）
-        year_filtered_df = result_df.copy()
-        if selected_year != "全部年份":
-            year_filtered_df = year_filtered_df[year_filtered_df['年份'] == int(selected_year)]
-        
-        return result_df, year_filtered_df
+            # 其他输入：只在去重后的股票代码类别上匹配，再按类别编码映射回每一行
+            category_mask = arrow_match(search_index["code_categories"], needle.zfill(6))
+            rows = np.flatnonzero(expand_category_mask(category_mask, df['股票代码'].cat.codes.to_numpy()))
+    else:
+        # 企业名称同样只在去重后的小写名称类别上匹配，不生成逐行的小写副本
+        category_mask = arrow_match(search_index["name_categories_lower"], needle.lower())
+        rows = np.flatnonzero(expand_category_mask(category_mask, df['企业名称'].cat.codes.to_numpy()))
+    result_df = df.iloc[rows]
+    
+    # 即使选单一年份，也保留所有年份数据（用于画趋势图）
+    year_filtered_df = result_df
+    if selected_year is not None:
+        year_rows = rows[year_masks[selected_year][rows]]
+        year_filtered_df = df.iloc[year_rows]
+    
+    return result_df, year_filtered_df
+
+# 不缓存的外层：捕获查询异常并提示，本次返回空结果
+def search_data(data_version, search_input, search_type, selected_year):
+    try:
+        return query_data(data_version, search_input, search_type, selected_year)
     except Exception as e:
         st.error(f"搜索出错：{str(e)}")
         return pd.DataFrame(), pd.DataFrame()
 
 # ===================== 绘制趋势图函数（修复标题拼接错误） =====================
+# 按结果集内容计算缓存键：同一批企业与年份的图表只构建一次
+def hash_dataframe(df):
+    return pd.util.hash_pandas_object(df, index=False).values.tobytes()
+
+@st.cache_data(max_entries=128, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})  # 限制缓存的图表数量，避免随查询种类无限增长
 def plot_trend_chart(full_result_df, selected_year):
     # 关键修复：将selected_year转为字符串再拼接
-    title_suffix = f"|{str(selected_year)}年" if selected_year != "全部年份" else ""
+    title_suffix = f"|{str(selected_year)}年" if selected_year is not None else ""
     fig = px.line(
         full_result_df,
         x='年份',
         y='数字化转型指数',
         color='企业名称',
         markers=True,
+        render_mode='webgl',  # 多企业曲线时用WebGL渲染，前端绘制更快
         title=f'数字化转型指数趋势（1999-2023）{title_suffix}',  # 修复拼接错误
         labels={
             '年份': '年份',
@@ -155,16 +398,18 @@ def plot_trend_chart(full_result_df, selected_year):
     )
     
     # 高亮选中的年份（如果是单年份）
-    if selected_year != "全部年份":
-        target_year = int(selected_year)
+    if selected_year is not None:
+        target_year = selected_year
+        # 一次取出目标年份的 (企业名称 -> 指数)，每条曲线直接查表，不再逐条扫描结果集
+        year_rows = full_result_df[full_result_df['年份'] == target_year]
+        year_values = dict(zip(year_rows['企业名称'].astype(str), year_rows['数字化转型指数']))
         for trace in fig.data:
-            year_idx = full_result_df[(full_result_df['企业名称'] == trace.name) & (full_result_df['年份'] == target_year)].index
-            if len(year_idx) > 0:
-                idx = year_idx[0]
+            value = year_values.get(trace.name)
+            if value is not None:
                 fig.add_annotation(
                     x=target_year,
-                    y=full_result_df.loc[idx, '数字化转型指数'],
-                    text=f'{target_year}年: {full_result_df.loc[idx, "数字化转型指数"]}',
+                    y=value,
+                    text=f'{target_year}年: {value:.2f}',  # float32 统一按两位小数显示
                     showarrow=True,
                     arrowhead=2,
                     ax=0,
@@ -178,39 +423,84 @@ def plot_trend_chart(full_result_df, selected_year):
     )
     return fig
 
+# ===================== 导出CSV函数 =====================
+# Arrow的C++写入器生成CSV字节并前置UTF-8 BOM（Excel打开中文不乱码），同一结果集只序列化一次
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})  # 只在点击下载时生成，保留少量最近导出即可
+def build_csv_bytes(export_df):
+    table = pa.Table.from_pandas(export_df, preserve_index=False)
+    # category列在Arrow中为dictionary类型，写出前还原为普通字符串
+    table = table.cast(pa.schema([
+        pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ]))
+    buffer = io.BytesIO()
+    buffer.write(codecs.BOM_UTF8)
+    pa_csv.write_csv(table, buffer)
+    return buffer.getvalue()
+
 # ===================== 结果展示函数 =====================
-def display_results(full_result_df, year_filtered_df, search_input, selected_year):
+def display_results(full_result_df, year_filtered_df, search_input, selected_year, company_stats):
     if year_filtered_df.empty:
         st.warning("未找到匹配数据！示例：600008（首创股份）")
         return
     
     total = len(year_filtered_df)
     companies = year_filtered_df['股票代码'].nunique()
-    year_text = selected_year if selected_year != "全部年份" else f"{full_result_df['年份'].min()}-{full_result_df['年份'].max()}"
+    if selected_year is not None:
+        year_text = str(selected_year)
+    else:
+        year_range = full_result_df['年份'].agg(['min', 'max'])
+        year_text = f"{year_range['min']}-{year_range['max']}"
     st.success(f"搜索结果 | {total:,} 条 | {companies} 家公司 | 年份：{year_text}")
     
+    # 结果恰为某一家公司的全部记录时，直接取预计算的统计值
+    first_code = year_filtered_df['股票代码'].iloc[0]
+    if companies == 1 and company_stats.at[first_code, 'count'] == total:
+        stats = company_stats.loc[first_code]
+    else:
+        stats = year_filtered_df['数字化转型指数'].astype('float64').round(2).agg(['mean', 'max', 'min'])
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("平均指数", f"{year_filtered_df['数字化转型指数'].mean():.2f}")
+        st.metric("平均指数", f"{stats['mean']:.2f}")
     with col2:
-        st.metric("最高指数", f"{year_filtered_df['数字化转型指数'].max():.2f}")
+        st.metric("最高指数", f"{stats['max']:.2f}")
     with col3:
-        st.metric("最低指数", f"{year_filtered_df['数字化转型指数'].min():.2f}")
+        st.metric("最低指数", f"{stats['min']:.2f}")
     
     st.subheader("📈 数字化转型指数趋势图")
     fig = plot_trend_chart(full_result_df, selected_year)
     st.plotly_chart(fig)
     
     st.subheader("详细数据")
-    display_df = year_filtered_df.copy().reset_index(drop=True)
-    display_df.index = display_df.index + 1
-    st.dataframe(display_df[['股票代码', '企业名称', '年份', '数字化转型指数']])
+    # 只做一次列选择，表格展示与CSV导出共用同一份切片
+    display_df = year_filtered_df[REQUIRED_COLS]
+    display_df.index = range(1, len(display_df) + 1)
+    
+    page_count = (total - 1) // PAGE_SIZE + 1
+    page = 1
+    if page_count > 1:
+        # 页码存放在会话状态中，每次执行新查询时重置为第1页
+        page = st.number_input(f"页码（共 {page_count} 页，每页 {PAGE_SIZE} 条）", min_value=1, max_value=page_count, step=1, key="result_page")
+    page_start = (page - 1) * PAGE_SIZE
+    # 固定列宽，避免前端按内容自动计算列宽
+    st.dataframe(
+        display_df.iloc[page_start:page_start + PAGE_SIZE],
+        width="stretch",
+        hide_index=False,
+        column_config={
+            '股票代码': st.column_config.Column(width="small"),
+            '企业名称': st.column_config.Column(width="medium"),
+            '年份': st.column_config.Column(width="small"),
+            '数字化转型指数': st.column_config.Column(width="small")
+        }
+    )
     
-    csv_data = display_df[['股票代码', '企业名称', '年份', '数字化转型指数']].to_csv(index=False, encoding='utf-8-sig')
+    # data传入可调用对象（Streamlit 1.52+）：只有点击下载时才生成CSV字节，平时rerun不做序列化
     st.download_button(
         label="下载CSV数据",
-        data=csv_data,
-        file_name=f"转型指数_查询结果_{search_input}_{selected_year}.csv",
+        data=lambda: build_csv_bytes(display_df),
+        file_name=f"转型指数_查询结果_{search_input}_{format_year(selected_year)}.csv",
         mime="text/csv"
     )
 
@@ -220,7 +510,7 @@ def main():
     
     st.title("📊 上市公司数字化转型指数查询系统")
     st.markdown("### 📅 1999-2023年 | 📌 股票代码/企业名称查询")
-    st.markdown('<hr class="divider">', unsafe_allow_html=True)
+    st.markdown(DIVIDER_HTML, unsafe_allow_html=True)
     
     data_result = load_data()
     if data_result["status"] == "error":
@@ -229,10 +519,12 @@ def main():
     else:
         st.info(data_result["msg"])
         df = data_result["data"]
+        data_version = data_result["data_version"]
+        company_stats = data_result["index"]["company_stats"]
     
     with st.sidebar:
         st.header("🔍 查询设置")
-        st.markdown('<hr class="divider" style="margin:0.5rem 0;">', unsafe_allow_html=True)
+        st.markdown(SIDEBAR_DIVIDER_HTML, unsafe_allow_html=True)
         
         st.session_state.search_type = st.radio(
             "查询方式",
@@ -254,16 +546,15 @@ def main():
                 placeholder="首创"
             )
         
-        st.markdown('<hr class="divider" style="margin:0.5rem 0;">', unsafe_allow_html=True)
+        st.markdown(SIDEBAR_DIVIDER_HTML, unsafe_allow_html=True)
         
-        year_options = ["全部年份"] + sorted(df['年份'].unique().astype(str))  # 年份转为字符串
         try:
-            year_index = year_options.index(str(st.session_state.selected_year))
+            year_index = YEAR_OPTIONS.index(st.session_state.selected_year)
         except ValueError:
             year_index = 0
-        st.session_state.selected_year = st.selectbox("查询年份", year_options, index=year_index)
+        st.session_state.selected_year = st.selectbox("查询年份", YEAR_OPTIONS, index=year_index, format_func=format_year)
         
-        st.markdown('<hr class="divider" style="margin:0.5rem 0;">', unsafe_allow_html=True)
+        st.markdown(SIDEBAR_DIVIDER_HTML, unsafe_allow_html=True)
         
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
@@ -271,7 +562,7 @@ def main():
         with col_btn2:
             if st.button("重置"):
                 st.session_state.search_input = ""
-                st.session_state.selected_year = "全部年份"
+                st.session_state.selected_year = None
                 st.session_state.search_results = None
                 st.info("已重置！")
     
@@ -280,28 +571,30 @@ def main():
             st.warning("请输入查询内容！")
         else:
             full_result_df, year_filtered_df = search_data(
-                df,
+                data_version,
                 st.session_state.search_input,
                 st.session_state.search_type,
                 st.session_state.selected_year
             )
             st.session_state.full_result = full_result_df
             st.session_state.year_filtered = year_filtered_df
-            display_results(full_result_df, year_filtered_df, st.session_state.search_input, st.session_state.selected_year)
+            st.session_state.result_page = 1  # 新查询从第1页开始，避免沿用上一次查询的页码
+            display_results(full_result_df, year_filtered_df, st.session_state.search_input, st.session_state.selected_year, company_stats)
     
     elif st.session_state.get('full_result') is not None:
         display_results(
             st.session_state.full_result,
             st.session_state.year_filtered,
             st.session_state.search_input,
-            st.session_state.selected_year
+            st.session_state.selected_year,
+            company_stats
         )
     
     else:
         st.subheader("💡 数据示例（前10条）")
-        sample_df = df.head(10).copy()
-        sample_df.index = sample_df.index + 1
-        st.dataframe(sample_df[['股票代码', '企业名称', '年份', '数字化转型指数']])
+        sample_df = df[REQUIRED_COLS].head(10)
+        sample_df.index = range(1, len(sample_df) + 1)
+        st.dataframe(sample_df)
         st.info("请在左侧边栏输入查询条件，点击「执行查询」！")
 
 if __name__ == "__main__":